@@ -1,14 +1,45 @@
 # retail33app.py
-import streamlit as st
-import pandas as pd
-import numpy as np
+import os, sys, io, hashlib, time, math, importlib
 import datetime as dt
-import io, hashlib, time
+from contextlib import contextmanager
 from datetime import datetime
-from supabase import create_client
-from streamlit_extras.stylable_container import stylable_container
-from PIL import Image, ImageOps
-import httpx
+from typing import TYPE_CHECKING
+import streamlit as st
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# =========== Perfil de arranque ===========
+# Activa con RETAIL33_PROFILE=1, ?profile=1 o [app] profile_startup = true.
+# Supabase (+httpx), pandas, PIL, xlsxwriter y stylable_container se importan solo en la
+# pestaña/acción que los usa (lazy_import); el login dibuja el formulario sin cliente.
+# El presupuesto se evalúa contra el tiempo del script; el arranque del servidor se
+# reporta aparte como CPU del proceso (no incluye la espera hasta la primera visita).
+STARTUP_BUDGET_MS = 1500
+_RUN_T0 = time.perf_counter()   # se reinicia en cada rerun
+
+@st.cache_resource(show_spinner=False)
+def _boot_log() -> dict:
+    """Tiempos de arranque del proceso; sobrevive a los reruns y se comparte entre sesiones."""
+    return {"server_cpu_ms": time.process_time() * 1000, "steps": {}, "served": False}
+
+@contextmanager
+def boot_step(name: str):
+    """Mide un subsistema: la primera vez en el proceso es 'frío', las siguientes 'tibio'."""
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        step = _boot_log()["steps"].setdefault(name, {})
+        step["tibio" if "frío" in step else "frío"] = (time.perf_counter() - t) * 1000
+
+def lazy_import(name: str):
+    """Importa un módulo bajo demanda; registra el tiempo solo si es la primera vez."""
+    mod = sys.modules.get(name)
+    if mod is not None:
+        return mod
+    with boot_step(f"import {name}"):
+        return importlib.import_module(name)
 
 # =========== Ajustes de compresión (rápida) ===========
 FAST_TARGET_KB = 300
@@ -17,6 +48,7 @@ FAST_PREFER_WEBP = True   # intenta WebP primero
 
 # =========== Streamlit ===========
 st.set_page_config(page_title="Retail 33", page_icon="🛍️", layout="wide")
+_boot_log()   # fija la CPU de arranque del servidor antes de cualquier trabajo del script
 
 # ---- CSS base ----
 st.markdown("""
@@ -39,24 +71,82 @@ h1, h2, h3, h4, h5, h6 { color:#4a4a4a !important; }
 # =========== Supabase ===========
 @st.cache_resource
 def get_sb():
+    lazy_import("httpx")   # la usan postgrest/gotrue/storage; se mide como paso propio
+    create_client = lazy_import("supabase").create_client
     supa = st.secrets.get("supabase", {})
     url = supa.get("url"); key = supa.get("anon_key")
     if not url or not key:
         st.error('Faltan secrets de Supabase. Crea .streamlit/secrets.toml con [supabase] url y anon_key.')
         st.stop()
     # Opciones con timeouts (compatibles)
-    try:
-        from supabase import ClientOptions
-        opts = ClientOptions(
-            postgrest_client_timeout=30,
-            storage_client_timeout=60,
-            retries=3
-        )
-        return create_client(url, key, options=opts)
-    except Exception:
-        return create_client(url, key)
+    with boot_step("supabase client"):
+        try:
+            from supabase import ClientOptions
+            opts = ClientOptions(
+                postgrest_client_timeout=30,
+                storage_client_timeout=60,
+                retries=3
+            )
+            return create_client(url, key, options=opts)
+        except Exception:
+            return create_client(url, key)
+
+# =========== Organización ===========
+# [app] org = "org1" (por defecto) / multi_org = true para filtrar stores/captures por columna "org"
+# sql/dashboard.sql es obligatorio en todas las instalaciones (el Dashboard usa sus RPC y la
+# columna org); multi_org además requiere users_profile.org en cada perfil.
+APP_CFG   = st.secrets.get("app", {})
+MULTI_ORG = bool(APP_CFG.get("multi_org", False))
+ORG_DEFAULT = APP_CFG.get("org", "org1")
+
+def current_org() -> str:
+    if MULTI_ORG:
+        return st.session_state.profile["org"]   # load_profile ya validó que exista
+    return ORG_DEFAULT
+
+def profiling_enabled() -> bool:
+    return (os.environ.get("RETAIL33_PROFILE") == "1"
+            or st.query_params.get("profile") == "1"
+            or bool(APP_CFG.get("profile_startup", False)))
+
+def boot_report(stage: str):
+    """Evalúa contra el presupuesto solo la primera ejecución de la sesión (tiempo del
+    script) y la muestra en sidebar + log del servidor, junto con los pasos del proceso."""
+    log = _boot_log()
+    rep = st.session_state.get("boot_report")
+    if rep is None:
+        cold = not log["served"]
+        log["served"] = True
+        rep = st.session_state["boot_report"] = {
+            "stage": stage, "tipo": "frío" if cold else "tibio",
+            "total": (time.perf_counter() - _RUN_T0) * 1000,
+            "budget": float(APP_CFG.get("startup_budget_ms", STARTUP_BUDGET_MS)),
+        }
+        if profiling_enabled():
+            steps = ", ".join(f"{n}={'/'.join(f'{k}:{v:.0f}ms' for k, v in t.items())}"
+                              for n, t in log["steps"].items())
+            print(f"[boot] {rep['tipo']} ({rep['stage']}): script={rep['total']:.0f}ms "
+                  f"budget={rep['budget']:.0f}ms server_cpu={log['server_cpu_ms']:.0f}ms {steps}",
+                  flush=True)
+    if not profiling_enabled():
+        return
+    title = f"⏱️ Arranque {rep['tipo']} ({rep['stage']}): {rep['total']:,.0f} ms"
+    with st.sidebar.expander(title, expanded=True):
+        st.caption(f"Servidor (CPU hasta el primer script): {log['server_cpu_ms']:,.0f} ms")
+        for name, t in _boot_log()["steps"].items():
+            st.caption(f"{name}: " + " · ".join(f"{k} {v:,.0f} ms" for k, v in t.items()))
+        if rep["total"] > rep["budget"]:
+            st.warning(f"Excede el presupuesto de {rep['budget']:,.0f} ms")
+        else:
+            st.success(f"Dentro del presupuesto de {rep['budget']:,.0f} ms")
 
-sb = get_sb()
+def org_param(org=None):
+    """Org para las RPC del Dashboard (None = sin filtro, modo single-org)."""
+    return (org or current_org()) if MULTI_ORG else None
+
+def scoped(q, org=None):
+    """Filtra un query de stores/captures por organización (solo si MULTI_ORG)."""
+    return q.eq("org", org or current_org()) if MULTI_ORG else q
 
 # =========== Login / Perfil ===========
 def login_ui():
@@ -65,7 +155,7 @@ def login_ui():
     pwd   = st.text_input("Contraseña", type="password")
     if st.button("Entrar"):
         try:
-            res = sb.auth.sign_in_with_password({"email": email, "password": pwd})
+            res = get_sb().auth.sign_in_with_password({"email": email, "password": pwd})
             st.session_state.user = res.user
             st.rerun()
         except Exception as e:
@@ -74,19 +164,24 @@ def login_ui():
 def require_login():
     if "user" not in st.session_state:
         login_ui()
+        boot_report("login")
         st.stop()
 
 def load_profile():
     uid = st.session_state.user.id
-    resp = (sb.table("users_profile")
-              .select("id,email,role,store_code")
-              .eq("id", uid)
-              .maybe_single()
-              .execute())
+    with boot_step("perfil"):
+        resp = (sb.table("users_profile")
+                  .select("id,email,role,store_code" + (",org" if MULTI_ORG else ""))
+                  .eq("id", uid)
+                  .maybe_single()
+                  .execute())
     prof = resp.data
     if prof is None:
         st.error("Tu usuario no tiene perfil en users_profile. Crea esa fila (id, email, role, store_code).")
         st.stop()
+    if MULTI_ORG and not prof.get("org"):
+        st.error("Tu perfil no tiene organización (users_profile.org). Asígnala antes de entrar.")
+        st.stop()
     st.session_state.profile = prof
     return prof
 
@@ -95,6 +190,8 @@ def role_and_store():
     return prof["role"], prof.get("store_code")
 
 # =========== Constantes ===========
+# Cada categoría necesita su columna <clave>_si en captures; el score del Dashboard
+# (dashboard_stores en sql/dashboard.sql) recibe estas claves como p_cats.
 CATEGORIAS = [
     ("pasarela","Pasarela de la moda"),
     ("acomodo","Acomodo guía visual"),
@@ -149,13 +246,96 @@ STORES_32 = [
     {"code":"T47","name":"Parques Puebla","city":"Puebla","status":"abierta"},
     {"code":"T55","name":"Angelópolis","city":"Puebla","status":"abierta"},
 ]
+# Catálogo local por organización (agrega aquí nuevas cadenas/regiones)
+CATALOGOS = {"org1": STORES_32}
+
+# Grid del Dashboard
+GRID_COLS = 3
+GRID_PAGE_SIZE = 30   # múltiplo de GRID_COLS
+SCORE_BANDS = {
+    "Todos":          None,
+    "Alto (≥80%)":    (0.8, 1.01),
+    "Medio (50–79%)": (0.5, 0.8),
+    "Bajo (<50%)":    (0.0, 0.5),
+    "Sin captura":    "none",
+}
 
 # =========== Helpers de DB / Storage ===========
+STORES_CHUNK = 1000   # tope por respuesta de PostgREST (max-rows por defecto)
+
 def get_stores():
-    resp = sb.table("stores").select("code,name,city,status").order("code").execute()
-    return pd.DataFrame(resp.data)
+    """Catálogo completo, pedido por bloques con .range() para no quedar truncado."""
+    pd = lazy_import("pandas")
+    rows, start = [], 0
+    while True:
+        resp = (scoped(sb.table("stores").select("code,name,city,status"))
+                  .order("code").range(start, start + STORES_CHUNK - 1).execute())
+        chunk = resp.data or []
+        rows.extend(chunk)
+        if len(chunk) < STORES_CHUNK:
+            break
+        start += STORES_CHUNK
+    return pd.DataFrame(rows, columns=["code","name","city","status"])
+
+# Score, KPIs y facetas se calculan en la base: ver sql/dashboard.sql
+CAT_KEYS = [k for k, _ in CATEGORIAS]
+
+def dashboard_rpc(fn, *args, **kwargs):
+    """Llama a un helper del Dashboard; si faltan las RPC/columnas, avisa en lugar de romper."""
+    try:
+        return fn(*args, **kwargs)
+    except lazy_import("postgrest.exceptions").APIError as e:
+        st.error(f"No pude consultar el Dashboard ({e.message}). "
+                 "¿Ya se ejecutó sql/dashboard.sql en Supabase (SQL Editor)?")
+        st.stop()
 
-def _resize_keep_aspect(im: Image.Image, max_side: int) -> Image.Image:
+@st.cache_data(ttl=300, show_spinner=False)
+def store_facets(org: str) -> dict:
+    """Valores posibles de ciudad/estatus (para los filtros del grid)."""
+    resp = sb.rpc("store_facet_values", {"p_org": org_param(org)}).execute()
+    out = {"city": [], "status": []}
+    for r in resp.data or []:
+        out.setdefault(r["facet"], []).append(r["value"])
+    return out
+
+def get_day_kpis(fecha) -> dict:
+    """{total, captured, avg_score} del día, agregados en Supabase."""
+    resp = sb.rpc("dashboard_kpis", {"p_date": str(fecha), "p_cats": CAT_KEYS,
+                                     "p_org": org_param()}).execute()
+    return (resp.data or [{}])[0]
+
+def dashboard_query(fecha, city=None, status=None, band=None, search=None, count=None):
+    """Tiendas + score del día (RPC dashboard_stores) con los filtros aplicados en el query."""
+    q = sb.rpc("dashboard_stores", {"p_date": str(fecha), "p_cats": CAT_KEYS,
+                                    "p_org": org_param()}, count=count)
+    # caracteres reservados de la sintaxis or=(...) de PostgREST
+    search = "".join(ch for ch in (search or "") if ch not in ",()*\\").strip()
+    if search:
+        q = q.or_(f"code.ilike.*{search}*,name.ilike.*{search}*")
+    if city:
+        q = q.eq("city", city)
+    if status:
+        q = q.eq("status", status)
+    if band == "none":
+        q = q.eq("has_capture", False)
+    elif band:
+        q = q.eq("has_capture", True).gte("score_visual", band[0]).lt("score_visual", band[1])
+    return q
+
+def count_stores(fecha, city=None, status=None, band=None, search=None) -> int:
+    resp = dashboard_query(fecha, city, status, band, search, count="exact").range(0, 0).execute()
+    return resp.count or 0
+
+def query_stores_page(fecha, city=None, status=None, band=None, search=None,
+                      page=1, page_size=GRID_PAGE_SIZE):
+    """Una página de tiendas filtrada en Supabase."""
+    start = (page - 1) * page_size
+    resp = (dashboard_query(fecha, city, status, band, search)
+              .order("code").range(start, start + page_size - 1).execute())
+    return resp.data or []
+
+def _resize_keep_aspect(im: "Image.Image", max_side: int) -> "Image.Image":
+    Image = lazy_import("PIL.Image")
     w, h = im.size
     side = max(w, h)
     if side <= max_side:
@@ -163,7 +343,7 @@ def _resize_keep_aspect(im: Image.Image, max_side: int) -> Image.Image:
     scale = max_side / float(side)
     return im.resize((int(w*scale), int(h*scale)), Image.LANCZOS)
 
-def _encode(im: Image.Image, fmt: str, quality: int) -> bytes:
+def _encode(im: "Image.Image", fmt: str, quality: int) -> bytes:
     buf = io.BytesIO()
     if fmt.upper() == "WEBP":
         im.save(buf, format="WEBP", quality=quality, method=6)
@@ -179,6 +359,8 @@ def compress_image_adaptive(file, target_kb=FAST_TARGET_KB, max_dim=FAST_MAX_DIM
         file.seek(0)
     except Exception:
         pass
+    Image = lazy_import("PIL.Image")
+    ImageOps = lazy_import("PIL.ImageOps")
     img = Image.open(file)
     img = ImageOps.exif_transpose(img)
     if img.mode in ("RGBA", "LA"):
@@ -220,12 +402,15 @@ def file_sha1(data: bytes) -> str:
 
 # --- Naming policy: sobrescribir siempre la última ---
 LATEST_MODE = True
+def photo_prefix(store_code: str, categoria_key: str, typ: str) -> str:
+    return f"{current_org()}/store_{store_code}/{categoria_key}/{typ}/"
+
 def make_path(store_code: str, categoria_key: str, typ: str) -> str:
     # typ: "guide" o "current"
     if LATEST_MODE:
-        return f"org1/store_{store_code}/{categoria_key}/{typ}/latest.jpg"
+        return photo_prefix(store_code, categoria_key, typ) + "latest.jpg"
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"org1/store_{store_code}/{categoria_key}/{typ}/{ts}.jpg"
+    return photo_prefix(store_code, categoria_key, typ) + f"{ts}.jpg"
 
 def upload_photo(file, bucket, path, target_kb=FAST_TARGET_KB):
     """Comprime y sube a Supabase Storage. Devuelve URL firmada (24h)."""
@@ -269,7 +454,7 @@ def delete_photo(bucket: str, store_code: str, categoria_key: str, typ: str) ->
     - LATEST_MODE=False: borra archivos cuyo nombre empiece por YYYYMMDD_ (hoy)
     Devuelve cuántos archivos borró.
     """
-    prefix = f"org1/store_{store_code}/{categoria_key}/{typ}/"
+    prefix = photo_prefix(store_code, categoria_key, typ)
     if LATEST_MODE:
         # Borrar latest.jpg si existe
         items = sb.storage.from_(bucket).list(path=prefix) or []
@@ -291,21 +476,23 @@ def delete_latest(bucket, prefix):
     return False
 
 def get_guide_url(store_code, categoria_key):
-    _, url = list_latest("guides", f"org1/store_{store_code}/{categoria_key}/guide/")
+    _, url = list_latest("guides", photo_prefix(store_code, categoria_key, "guide"))
     return url
 
 def get_current_url(store_code, categoria_key):
-    _, url = list_latest("current", f"org1/store_{store_code}/{categoria_key}/current/")
+    _, url = list_latest("current", photo_prefix(store_code, categoria_key, "current"))
     return url
 
 def upsert_capture(date_val, store_code, notes, form_vals, created_by):
-    sel = sb.table("captures").select("id").eq("date", str(date_val)).eq("store_code", store_code).execute()
+    sel = scoped(sb.table("captures").select("id")).eq("date", str(date_val)).eq("store_code", store_code).execute()
     payload = {
         "date": str(date_val),
         "store_code": store_code,
         "notes": notes,
         "created_by": created_by
     }
+    if MULTI_ORG:
+        payload["org"] = current_org()
     payload.update(form_vals)
     if sel.data:
         cid = sel.data[0]["id"]
@@ -316,6 +503,7 @@ def upsert_capture(date_val, store_code, notes, form_vals, created_by):
         return "insert"
 
 def with_retries(fn, *args, **kwargs):
+    httpx = lazy_import("httpx")   # ya cargada por get_sb()
     last_err = None
     for i in range(3):
         try:
@@ -333,6 +521,7 @@ def nocache(url: str) -> str:
 
 # =========== App ===========
 require_login()
+sb = get_sb()
 role, my_store = role_and_store()
 is_admin = role in ("jefe","andrea")
 st.caption(f"Conectado como **{role}** — tienda: **{my_store or 'todas'}**")
@@ -350,38 +539,44 @@ st.session_state["active_tab"] = active_tab
 # ==================== DASHBOARD ====================
 if st.session_state["active_tab"] == "📊 Dashboard":
     st.subheader("Resumen visual (por fecha)")
-    df_stores = get_stores()
+    org = current_org()
     fecha_dash = st.date_input("Fecha", dt.date.today(), key="fecha_dash")
 
-    # Capturas del día
-    resp = sb.table("captures").select("*").eq("date", str(fecha_dash)).execute()
-    df_cap = pd.DataFrame(resp.data or [])
-
-    # Asegura columnas
-    if "store_code" not in df_cap.columns:
-        df_cap["store_code"] = pd.Series(dtype="object")
-    if "notes" not in df_cap.columns:
-        df_cap["notes"] = pd.Series(dtype="object")
-    for k, _ in CATEGORIAS:
-        col = f"{k}_si"
-        if col not in df_cap.columns:
-            df_cap[col] = pd.Series(dtype="float")
-
-    # Merge tiendas + capturas
-    df = df_stores.merge(df_cap, how="left", left_on="code", right_on="store_code")
-
-    # Score + color
-    for k, _ in CATEGORIAS:
-        if f"{k}_si" not in df.columns:
-            df[f"{k}_si"] = pd.NA
-
-    has_data = df[[f"{k}_si" for k, _ in CATEGORIAS]].notna().any(axis=1)
-
-    def score_row(r):
-        vals = [(1.0 if bool(r.get(f"{k}_si")) else 0.0) for k, _ in CATEGORIAS]
-        return float(np.mean(vals)) if vals else 0.0
+    kpis = dashboard_rpc(get_day_kpis, fecha_dash)
+    facets = dashboard_rpc(store_facets, org)
 
-    df["score_visual"] = df.apply(score_row, axis=1)
+    # KPIs (tiendas sin captura cuentan como 0)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Tiendas", int(kpis.get("total") or 0))
+    c2.metric("Capturas hoy", int(kpis.get("captured") or 0))
+    c3.metric("Score promedio", f"{float(kpis.get('avg_score') or 0)*100:,.1f}%")
+
+    # Filtros (se aplican en el query a Supabase, no en el cliente)
+    # Empleados abren con su tienda en la búsqueda (solo pueden capturar esa).
+    f_search = st.text_input("Buscar tienda (código o nombre)",
+                             value="" if is_admin else (my_store or ""), key="f_search")
+    f1, f2, f3 = st.columns(3)
+    f_city   = f1.selectbox("Ciudad", ["Todas"] + facets["city"], key="f_city")
+    f_status = f2.selectbox("Estatus", ["Todos"] + facets["status"], key="f_status")
+    f_band   = f3.selectbox("Score", list(SCORE_BANDS), key="f_band")
+    filtros = dict(
+        city=None if f_city == "Todas" else f_city,
+        status=None if f_status == "Todos" else f_status,
+        band=SCORE_BANDS[f_band],
+        search=f_search,
+    )
+
+    # Página actual: "grid_page" es estado propio; el widget "grid_page_ui" solo lo edita.
+    # Vuelve a la 1 si cambian fecha/filtros y se acota antes de pedir la página.
+    sig = (org, str(fecha_dash), f_search, f_city, f_status, f_band)
+    if st.session_state.get("grid_sig") != sig:
+        st.session_state["grid_sig"] = sig
+        st.session_state["grid_page"] = 1
+    total = dashboard_rpc(count_stores, fecha_dash, **filtros)
+    n_pages = max(1, math.ceil(total / GRID_PAGE_SIZE))
+    page = min(max(1, int(st.session_state.get("grid_page", 1))), n_pages)
+    st.session_state["grid_page"] = page
+    rows = dashboard_rpc(query_stores_page, fecha_dash, page=page, **filtros) if total else []
 
     def color_from_score(have, score):
         if not have: return "#E5E5E5"
@@ -389,27 +584,26 @@ if st.session_state["active_tab"] == "📊 Dashboard":
         if score >= 0.5: return "#FFF3B0"
         return "#FFB5A7"
 
-    df["color"] = [color_from_score(h, s) for h, s in zip(has_data, df["score_visual"])]
-    # Si la tienda está cerrada, fuerza gris
-    df.loc[df["status"].str.lower() == "cerrada", "color"] = "#E0E0E0"
-
-    # KPIs
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Tiendas", len(df_stores))
-    c2.metric("Capturas hoy", int(has_data.sum()))
-    c3.metric("Score promedio", f"{df['score_visual'].mean()*100:,.1f}%")
+    for r in rows:
+        r["score_visual"] = float(r.get("score_visual") or 0)
+        r["color"] = color_from_score(r.get("has_capture"), r["score_visual"])
+        # Si la tienda está cerrada, fuerza gris
+        if (r.get("status") or "").lower() == "cerrada":
+            r["color"] = "#E0E0E0"
 
-    # Grid clickeable
+    # Grid clickeable (solo la página actual)
     st.markdown("### 🛍️ Tiendas (clic para capturar)")
     TILE_STYLE = "min-height:110px; display:flex; flex-direction:column; justify-content:center;"
     st.session_state.setdefault("selected_store", None)
-    grid_cols = 3
-    blocks = [df.iloc[i:i+grid_cols] for i in range(0, len(df), grid_cols)]
-
-    for block in blocks:
-        cols = st.columns(len(block), gap="medium")
-        for j, (_, r) in enumerate(block.iterrows()):
-            sc = int(round(float(r.get("score_visual") or 0) * 100))
+    st.caption(f"{total} tiendas — página {page} de {n_pages}")
+    if not rows:
+        st.info("Ninguna tienda coincide con los filtros.")
+
+    for i in range(0, len(rows), GRID_COLS):
+        block = rows[i:i+GRID_COLS]
+        cols = st.columns(GRID_COLS, gap="medium")
+        for j, r in enumerate(block):
+            sc = int(round(r["score_visual"] * 100))
             can_click = is_admin or (my_store == r["code"])
             cols[j].markdown(
                 f"""<div class="store" style="background:{r['color']}; {TILE_STYLE}">
@@ -425,25 +619,40 @@ if st.session_state["active_tab"] == "📊 Dashboard":
                 st.session_state["active_tab"] = "📝 Captura"
                 st.rerun()
 
-    # Detalle (solo admins)
+    if n_pages > 1:
+        def _sync_grid_page():
+            st.session_state["grid_page"] = int(st.session_state["grid_page_ui"])
+
+        st.session_state["grid_page_ui"] = page
+        st.number_input("Página", min_value=1, max_value=n_pages, step=1,
+                        key="grid_page_ui", on_change=_sync_grid_page)
+
+    # Detalle (solo admins, página actual)
     if is_admin:
         st.markdown("### 🔍 Detalle")
-        show_cols = ["code","name","city","status","score_visual","notes"]
-        if not df.empty:
+        if rows:
+            pd = lazy_import("pandas")
+            df = pd.DataFrame(rows)
+            show_cols = ["code","name","city","status","score_visual","notes"]
             st.dataframe(
                 df[show_cols].rename(columns={"code":"tienda","name":"nombre","score_visual":"score_0_1"}),
                 use_container_width=True
             )
         else:
-            st.info("Sin capturas para esa fecha.")
+            st.info("Sin tiendas para mostrar.")
 
 # ==================== CAPTURA ====================
 elif st.session_state["active_tab"] == "📝 Captura":
     st.subheader("Visita (captura + fotos)")
-    df_stores = get_stores()
+    stylable_container = lazy_import("streamlit_extras.stylable_container").stylable_container
     if is_admin:
-        codes = df_stores["code"].tolist()
-        default_ix = codes.index(st.session_state["selected_store"]) if st.session_state.get("selected_store") in codes else 0
+        codes = get_stores()["code"].tolist()
+        sel = st.session_state.get("selected_store")
+        if sel and sel not in codes:
+            # Nunca cambiar en silencio a otra tienda: se conserva la elegida en el Dashboard
+            st.warning(f"La tienda **{sel}** no aparece en el catálogo; se conserva la selección.")
+            codes = [sel] + codes
+        default_ix = codes.index(sel) if sel in codes else 0
         _store = st.selectbox("Tienda", codes, index=default_ix)
     else:
         _store = my_store
@@ -567,6 +776,7 @@ elif st.session_state["active_tab"] == "📝 Captura":
 # ==================== REPORTES ====================
 elif st.session_state["active_tab"] == "📤 Reportes":
     st.subheader("Exportar capturas")
+    pd = lazy_import("pandas")
     df = pd.DataFrame()
     colA, colB = st.columns(2)
     d1 = colA.date_input("Desde", dt.date.today().replace(day=1))
@@ -574,7 +784,7 @@ elif st.session_state["active_tab"] == "📤 Reportes":
     btn = st.button("🔎 Consultar")
 
     if btn:
-        q = sb.table("captures").select("*").gte("date", str(d1)).lte("date", str(d2))
+        q = scoped(sb.table("captures").select("*")).gte("date", str(d1)).lte("date", str(d2))
         if not is_admin and my_store:
             q = q.eq("store_code", my_store)
         resp = q.order("date").execute()
@@ -587,7 +797,7 @@ elif st.session_state["active_tab"] == "📤 Reportes":
             csv = df.to_csv(index=False).encode("utf-8")
             st.download_button("⬇️ Descargar CSV", data=csv, file_name="capturas.csv", mime="text/csv")
             try:
-                import xlsxwriter
+                lazy_import("xlsxwriter")
                 buff = io.BytesIO()
                 with pd.ExcelWriter(buff, engine="xlsxwriter") as w:
                     df.to_excel(w, index=False, sheet_name="capturas")
@@ -625,12 +835,12 @@ elif st.session_state["active_tab"] == "📤 Reportes":
 # ==================== CONFIGURACIÓN ====================
 elif st.session_state["active_tab"] == "⚙️ Configuración":
     st.subheader("Catálogo de tiendas (DB vs. lista local)")
+    pd = lazy_import("pandas")
     col_left, col_right = st.columns(2)
 
     # Ver tiendas en la DB
     if col_left.button("🔍 Ver tiendas en la DB"):
-        resp_db = sb.table("stores").select("code,name,city,status").order("code").execute()
-        df_db = pd.DataFrame(resp_db.data or [])
+        df_db = get_stores()
         st.info(f"Tiendas en DB: {len(df_db)}")
         st.dataframe(df_db, use_container_width=True)
     else:
@@ -638,23 +848,31 @@ elif st.session_state["active_tab"] == "⚙️ Configuración":
 
     # Vista previa lista local
     col_right.write("Lista local (lo que subiríamos):")
-    col_right.dataframe(pd.DataFrame(STORES_32), use_container_width=True)
+    catalogo = CATALOGOS.get(current_org(), [])
+    col_right.dataframe(pd.DataFrame(catalogo), use_container_width=True)
 
     st.markdown("---")
     c1, c2, _ = st.columns([1,2,2])
     confirm = c1.checkbox("Confirmo vaciar", value=False)
     if c2.button("🗑️ Vaciar tabla stores (admin)") and confirm:
         if is_admin:
-            sb.table("stores").delete().neq("code","").execute()
+            scoped(sb.table("stores").delete()).neq("code","").execute()
+            store_facets.clear()
             st.success("Tabla 'stores' vaciada.")
         else:
             st.error("Necesitas rol jefe/andrea para vaciar.")
 
-    if st.button("⬆️ Subir/actualizar catálogo (upsert)"):
+    if not catalogo:
+        st.info(f"No hay catálogo local para la organización **{current_org()}** (agrégalo en CATALOGOS).")
+    elif st.button("⬆️ Subir/actualizar catálogo (upsert)"):
         try:
-            sb.table("stores").upsert(STORES_32, on_conflict="code").execute()
-            resp_db = sb.table("stores").select("code,name,city,status").order("code").execute()
-            df_db = pd.DataFrame(resp_db.data or [])
+            if MULTI_ORG:
+                rows_up = [{**r, "org": current_org()} for r in catalogo]
+                sb.table("stores").upsert(rows_up, on_conflict="org,code").execute()
+            else:
+                sb.table("stores").upsert(catalogo, on_conflict="code").execute()
+            store_facets.clear()
+            df_db = get_stores()
             st.success(f"Listo. Tiendas en DB ahora: {len(df_db)}")
             st.dataframe(df_db, use_container_width=True)
         except Exception as e:
@@ -672,7 +890,7 @@ elif st.session_state["active_tab"] == "⚙️ Configuración":
         for store_code in stores:
             for key, _ in CATEGORIAS:
                 for typ in ["guide", "current"]:
-                    prefix = f"org1/store_{store_code}/{key}/{typ}/"
+                    prefix = photo_prefix(store_code, key, typ)
                     try:
                         items = sb.storage.from_(bucket).list(path=prefix) or []
                     except Exception:
@@ -697,3 +915,5 @@ elif st.session_state["active_tab"] == "⚙️ Configuración":
         deleted_current = cleanup_bucket("current", keep=int(keep_n))
         st.success(f"Listo. Borradas {deleted_guides + deleted_current} fotos "
                    f"(guides: {deleted_guides}, current: {deleted_current}).")
+
+boot_report(st.session_state["active_tab"])
@@ -0,0 +1,64 @@
+-- Retail 33 — objetos de base de datos que usa el Dashboard.
+-- Requerido en TODAS las instalaciones (single-org y multi-org): el Dashboard
+-- llama a dashboard_stores / dashboard_kpis / store_facet_values.
+-- Ejecutar en Supabase → SQL Editor. Es idempotente (se puede correr varias veces).
+
+-- =========== 1) Organización ===========
+-- Los datos existentes quedan en 'org1'. Con [app] multi_org = true la app filtra
+-- stores/captures por esta columna y lee users_profile.org (obligatorio en ese modo).
+alter table stores        add column if not exists org text not null default 'org1';
+alter table captures      add column if not exists org text not null default 'org1';
+alter table users_profile add column if not exists org text;
+
+-- Necesario para el upsert del catálogo con on_conflict="org,code".
+create unique index if not exists stores_org_code_key on stores (org, code);
+-- Para repetir códigos de tienda entre organizaciones, quita además la unicidad
+-- de stores.code (stores_pkey o stores_code_key, según tu esquema).
+
+create index if not exists captures_date_store_idx on captures (date, store_code);
+
+-- =========== 2) Score por tienda y fecha ===========
+-- Una fila por tienda; sin captura ese día => has_capture = false, score_visual = 0.
+-- p_cats: claves de CATEGORIAS de la app (cada una con su columna <clave>_si en captures);
+-- el score es la fracción de esas columnas en true.
+-- p_org null => todas las organizaciones (modo single-org).
+drop function if exists dashboard_kpis(date, text);
+drop function if exists dashboard_stores(date, text);
+
+create or replace function dashboard_stores(p_date date, p_cats text[], p_org text default null)
+returns table (
+  code text, name text, city text, status text,
+  score_visual double precision, has_capture boolean, notes text
+)
+language sql stable as $$
+  select s.code::text, s.name::text, s.city::text, s.status::text,
+         ( select count(*) from unnest(p_cats) k
+           where coalesce((to_jsonb(c) ->> (k || '_si'))::boolean, false)
+         )::double precision / greatest(cardinality(p_cats), 1),
+         c.id is not null,
+         c.notes::text
+  from stores s
+  left join captures c
+         on c.store_code = s.code and c.date = p_date and c.org = s.org
+  where p_org is null or s.org = p_org
+$$;
+
+-- KPIs del día agregados en la base (tiendas sin captura cuentan como 0).
+create or replace function dashboard_kpis(p_date date, p_cats text[], p_org text default null)
+returns table (total bigint, captured bigint, avg_score double precision)
+language sql stable as $$
+  select count(*),
+         count(*) filter (where has_capture),
+         coalesce(avg(score_visual), 0)
+  from dashboard_stores(p_date, p_cats, p_org)
+$$;
+
+-- Valores distintos de ciudad/estatus para los filtros del grid.
+create or replace function store_facet_values(p_org text default null)
+returns table (facet text, value text)
+language sql stable as $$
+  select 'city', city::text   from stores where city   is not null and (p_org is null or org = p_org)
+  union
+  select 'status', status::text from stores where status is not null and (p_org is null or org = p_org)
+  order by 1, 2
+$$;